@@ -0,0 +1,290 @@
+"""
+Excel parsing for tender notices.
+
+Kept separate from ``server.py`` so it can be imported without FastAPI,
+MongoDB or the app configuration. ``openpyxl`` and ``xlrd`` are only
+imported when a workbook of the matching type is actually parsed.
+
+Real NIT workbooks rarely start with a clean header row: they carry title
+rows (NIT number, dates) above the table and word the headers freely
+("ITEM NO.", "NAME OF WORK", "ESTIMATED COST RS. IN LACS"). The header row
+is therefore detected by scoring the first ``HEADER_SCAN_ROWS`` rows
+against ``HEADER_SYNONYMS``. Mappings with at least two columns are
+cached by a layout fingerprint (which cells are filled above the header
+plus the header text) so repeat layouts skip the scoring entirely.
+"""
+
+import io
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+
+class ExcelParseError(ValueError):
+    """Raised when an uploaded workbook cannot be read"""
+
+
+class WorkItem(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    work_no: str
+    work_description: str
+    estimated_cost: Optional[float] = None
+    completion_time: Optional[str] = None
+    location: Optional[str] = None
+    category: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Header detection
+HEADER_SCAN_ROWS = 20
+LAYOUT_CACHE_SIZE = 128
+
+# Normalised header wording (see normalize_header) for each WorkItem field
+HEADER_SYNONYMS: Dict[str, List[str]] = {
+    "work_no": [
+        "work no", "work number", "item no", "item number", "s no", "sr no", "sl no",
+        "serial no", "serial number", "sno", "srno", "slno", "nit item no",
+    ],
+    "work_description": [
+        "work description", "description of work", "description", "name of work",
+        "name of the work", "work name", "particulars", "name of work and location",
+    ],
+    "estimated_cost": [
+        "estimated cost", "estimate cost", "est cost", "estimated amount",
+        "estimated value", "cost of work", "amount put to tender", "cost",
+    ],
+    "completion_time": [
+        "completion time", "time of completion", "period of completion",
+        "completion period", "time allowed", "time limit", "duration",
+    ],
+    "location": ["location", "site", "place of work", "place"],
+    "category": ["category", "class", "type of work", "work type", "nature of work"],
+}
+KEY_FIELDS = ("work_no", "work_description")
+
+# Unit words in the estimated cost header and the rupee multiplier they imply
+COST_UNITS = {
+    "lac": 1e5, "lacs": 1e5, "lakh": 1e5, "lakhs": 1e5,
+    "crore": 1e7, "crores": 1e7,
+}
+# Unit words in the completion time header, applied to bare numbers
+TIME_UNITS = {
+    "day": "day", "days": "day",
+    "week": "week", "weeks": "week",
+    "month": "month", "months": "month",
+    "year": "year", "years": "year",
+}
+
+
+class ColumnMapping(NamedTuple):
+    columns: Dict[str, int]  # WorkItem field -> 0-based column index
+    cost_multiplier: float = 1.0
+    completion_unit: Optional[str] = None
+
+
+LayoutFingerprint = Tuple[Tuple[Tuple[bool, ...], ...], Tuple[str, ...]]
+
+# Parsing runs in threadpool workers, so the cache is shared between threads
+_layout_cache: "OrderedDict[LayoutFingerprint, ColumnMapping]" = OrderedDict()
+_layout_cache_lock = threading.Lock()
+
+
+def normalize_header(value: Any) -> str:
+    if value is None or not isinstance(value, str):
+        return ""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", value.lower()).split())
+
+
+def match_header(text: str) -> Optional[Tuple[str, float]]:
+    """Best (field, score) for one normalised header cell; 1.0 is an exact match"""
+    best = None
+    padded = f" {text} "
+    for field, synonyms in HEADER_SYNONYMS.items():
+        for synonym in synonyms:
+            if text == synonym:
+                score = 1.0
+            elif f" {synonym} " in padded:
+                # Partial matches score by how much of the header they explain
+                score = 0.5 + 0.4 * len(synonym) / len(text)
+            else:
+                continue
+            if best is None or score > best[1]:
+                best = (field, score)
+    return best
+
+
+def score_header_row(row: Sequence[Any]) -> Tuple[float, Optional[ColumnMapping]]:
+    candidates: Dict[str, Tuple[float, int]] = {}
+    exact_key_match = False
+    texts = [normalize_header(value) for value in row]
+    for col, text in enumerate(texts):
+        if not text:
+            continue
+        match = match_header(text)
+        if match is None:
+            continue
+        field, score = match
+        if field in KEY_FIELDS and score == 1.0:
+            exact_key_match = True
+        if field not in candidates or score > candidates[field][0]:
+            candidates[field] = (score, col)
+
+    if not any(field in candidates for field in KEY_FIELDS):
+        return 0.0, None
+    # A lone matching column only counts when it is spelled exactly
+    if len(candidates) < 2 and not exact_key_match:
+        return 0.0, None
+
+    columns = {field: col for field, (_, col) in candidates.items()}
+    cost_multiplier = 1.0
+    if "estimated_cost" in columns:
+        for word in texts[columns["estimated_cost"]].split():
+            cost_multiplier = COST_UNITS.get(word, cost_multiplier)
+    completion_unit = None
+    if "completion_time" in columns:
+        for word in texts[columns["completion_time"]].split():
+            completion_unit = TIME_UNITS.get(word, completion_unit)
+    mapping = ColumnMapping(columns, cost_multiplier, completion_unit)
+    return sum(score for score, _ in candidates.values()), mapping
+
+
+def _trimmed(values: List[Any]) -> Tuple[Any, ...]:
+    while values and not values[-1]:
+        values.pop()
+    return tuple(values)
+
+
+def layout_fingerprint(rows: Sequence[Sequence[Any]], header_row: int) -> LayoutFingerprint:
+    """Which cells are filled above the header row, plus the header text itself"""
+    shape = tuple(
+        _trimmed([value is not None and value != "" for value in row])
+        for row in rows[:header_row]
+    )
+    return shape, _trimmed([normalize_header(value) for value in rows[header_row]])
+
+
+def detect_header_row(rows: Sequence[Sequence[Any]]) -> Optional[Tuple[int, ColumnMapping]]:
+    """Find the header row among the first HEADER_SCAN_ROWS rows and map its columns"""
+    scan = rows[:HEADER_SCAN_ROWS]
+
+    # Cheap pass: a previously seen layout is recognised without scoring
+    for row_index in range(len(scan)):
+        fingerprint = layout_fingerprint(scan, row_index)
+        if not fingerprint[1]:
+            continue
+        with _layout_cache_lock:
+            mapping = _layout_cache.get(fingerprint)
+            if mapping is not None:
+                _layout_cache.move_to_end(fingerprint)
+        if mapping is not None:
+            return row_index, mapping
+
+    best_score, best = 0.0, None
+    for row_index, row in enumerate(scan):
+        score, mapping = score_header_row(row)
+        if mapping is not None and score > best_score:
+            best_score, best = score, (row_index, mapping)
+
+    # A single matched column is too weak a signal to reuse for other workbooks
+    if best is not None and len(best[1].columns) >= 2:
+        with _layout_cache_lock:
+            _layout_cache[layout_fingerprint(scan, best[0])] = best[1]
+            while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+                _layout_cache.popitem(last=False)
+    return best
+
+
+# Cell conversion
+def _cell_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _cell_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = re.sub(r"(?i)rs\.?|₹|,", "", str(value)).strip()
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _completion_time(value: Any, unit: Optional[str]) -> Optional[str]:
+    text = _cell_text(value)
+    number = _cell_number(value)
+    if text is None or unit is None or number is None:
+        return text
+    return f"{text} {unit}" if number == 1 else f"{text} {unit}s"
+
+
+def _read_rows(file_content: bytes, filename: str) -> List[List[Any]]:
+    if filename.endswith('.xlsx'):
+        import openpyxl
+
+        # data_only: read the values Excel last calculated rather than formulas
+        workbook = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            sheet.reset_dimensions()  # stored dimensions are often wrong
+            return [list(row) for row in sheet.iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+
+    if filename.endswith('.xls'):
+        import xlrd
+
+        sheet = xlrd.open_workbook(file_contents=file_content).sheet_by_index(0)
+        return [sheet.row_values(row_num) for row_num in range(sheet.nrows)]
+
+    return []
+
+
+def parse_excel_file(file_content: bytes, filename: str) -> List[WorkItem]:
+    """Parse Excel file and extract work items"""
+    work_items = []
+
+    try:
+        rows = _read_rows(file_content, filename)
+        detected = detect_header_row(rows)
+        if detected is None:
+            return work_items
+        header_row, mapping = detected
+
+        for offset, row in enumerate(rows[header_row + 1:], 1):
+            row_data = {
+                field: row[col] if col < len(row) else None
+                for field, col in mapping.columns.items()
+            }
+            work_no = _cell_text(row_data.get('work_no'))
+            work_description = _cell_text(row_data.get('work_description'))
+            if not (work_no or work_description):
+                continue
+
+            estimated_cost = _cell_number(row_data.get('estimated_cost'))
+            if estimated_cost and mapping.cost_multiplier != 1.0:
+                estimated_cost = round(estimated_cost * mapping.cost_multiplier, 2)
+            work_items.append(WorkItem(
+                work_no=work_no or f'WORK_{offset}',
+                work_description=work_description or '',
+                estimated_cost=estimated_cost or None,
+                completion_time=_completion_time(row_data.get('completion_time'), mapping.completion_unit),
+                location=_cell_text(row_data.get('location')),
+                category=_cell_text(row_data.get('category'))
+            ))
+
+    except Exception as e:
+        raise ExcelParseError(f"Error parsing Excel file: {str(e)}") from e
+
+    return work_items
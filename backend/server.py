@@ -1,31 +1,189 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Form, Header, Request, Response, WebSocket, WebSocketDisconnect, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from pymongo.monitoring import ConnectionPoolListener
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from abc import ABC, abstractmethod
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
 import uuid
-from datetime import datetime
-import openpyxl
-import xlrd
-import io
+import asyncio
+import json
+import threading
+import math
+import time
+from datetime import datetime, timedelta
 import base64
+import hashlib
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+try:
+    from .excel_parser import WorkItem, parse_excel_file
+except ImportError:  # running from inside backend/, e.g. `uvicorn server:app`
+    from excel_parser import WorkItem, parse_excel_file
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# The client is created inside the app lifespan rather than at import time,
+# so every uvicorn worker process opens its own pool after it has started.
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool counters for this process, fed by pymongo pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys([
+            "created", "closed", "checkout_started", "checked_out",
+            "checked_in", "checkout_failed", "pool_cleared",
+        ], 0)
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "open_connections": counts["created"] - counts["closed"],
+            "in_use": counts["checked_out"] - counts["checked_in"],
+            "waiting": counts["checkout_started"] - counts["checked_out"] - counts["checkout_failed"],
+            "total_checkouts": counts["checked_out"],
+            "checkout_failures": counts["checkout_failed"],
+            "pool_cleared": counts["pool_cleared"],
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._incr("pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._incr("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._incr("closed")
+
+    def connection_check_out_started(self, event):
+        self._incr("checkout_started")
+
+    def connection_check_out_failed(self, event):
+        self._incr("checkout_failed")
+
+    def connection_checked_out(self, event):
+        self._incr("checked_out")
+
+    def connection_checked_in(self, event):
+        self._incr("checked_in")
+
+
+pool_stats = PoolStats()
+
+
+def mongo_client_options() -> Dict[str, Any]:
+    """Pool, timeout and read preference settings, overridable from the environment"""
+    env = os.environ
+    return {
+        "maxPoolSize": int(env.get('MONGO_MAX_POOL_SIZE', '100')),
+        "minPoolSize": int(env.get('MONGO_MIN_POOL_SIZE', '10')),
+        "maxIdleTimeMS": int(env.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        "waitQueueTimeoutMS": int(env.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+        "serverSelectionTimeoutMS": int(env.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        "connectTimeoutMS": int(env.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        "socketTimeoutMS": int(env.get('MONGO_SOCKET_TIMEOUT_MS', '30000')),
+        "readPreference": env.get('MONGO_READ_PREFERENCE', 'primary'),
+    }
+
+
+async def ping_database(timeout: float = 5.0) -> bool:
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=timeout)
+        return True
+    except Exception as e:
+        logger.warning(f"MongoDB ping failed: {str(e)}")
+        return False
+
+
+async def connect_to_mongo():
+    global client, db
+    client = AsyncIOMotorClient(
+        os.environ['MONGO_URL'], event_listeners=[pool_stats], **mongo_client_options()
+    )
+    db = client[os.environ['DB_NAME']]
+    # Warm up: establish the first connection before serving traffic
+    if await ping_database():
+        logger.info("MongoDB connection ready")
+
+
+async def ensure_ttl_index(collection_name: str, field: str, expire_after_seconds: int) -> bool:
+    """Create a TTL index, logging instead of failing so startup survives a missing database"""
+    try:
+        await db[collection_name].create_index(field, expireAfterSeconds=expire_after_seconds)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not create TTL index on {collection_name}.{field}, will retry on use: {str(e)}")
+        return False
+
+
+def close_mongo_connection():
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
+    db = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await connect_to_mongo()
+    if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1 and not bid_events.use_change_streams:
+        logger.warning(
+            "Running several workers without BID_EVENTS_CHANGE_STREAMS: live bid feeds "
+            "only show bids submitted to the viewer's own worker"
+        )
+    await rate_limit_backend.setup()
+    await idempotency_store.setup()
+    try:
+        yield
+    finally:
+        bid_events.close()
+        close_mongo_connection()
+
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -40,16 +198,6 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
-class WorkItem(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    work_no: str
-    work_description: str
-    estimated_cost: Optional[float] = None
-    completion_time: Optional[str] = None
-    location: Optional[str] = None
-    category: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
 class TenderNotice(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     tender_no: str
@@ -116,76 +264,506 @@ class BidSubmissionCreate(BaseModel):
     remarks: Optional[str] = None
 
 
-# Utility functions for Excel processing
-def parse_excel_file(file_content: bytes, filename: str) -> List[WorkItem]:
-    """Parse Excel file and extract work items"""
-    work_items = []
-    
+# Live bid activity
+class BidEventBroker:
+    """Fan out new and updated bids to every live viewer of a tender.
+
+    Viewers of a tender share one queue set, and each process holds at most
+    one upstream subscription. By default events are published in-process
+    by ``submit_bid``, so a viewer only sees bids submitted to the same
+    worker: with several uvicorn workers, set
+    ``BID_EVENTS_CHANGE_STREAMS=true`` (requires a replica set). A single
+    collection-wide change stream per process then feeds every watched
+    tender, routed by the bid's ``tender_id``.
+    """
+
+    # $changeStream requires a replica set or sharded cluster
+    UNSUPPORTED_ERROR_CODES = {40573}
+    HISTORY_LOST_ERROR_CODES = {280, 286}
+
+    def __init__(self, use_change_streams: bool = False, queue_size: int = 100,
+                 retry_delay: float = 1.0):
+        self.use_change_streams = use_change_streams
+        self.queue_size = queue_size
+        self.retry_delay = retry_delay
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    def subscribe(self, tender_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(tender_id, set()).add(queue)
+        if self.use_change_streams and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+        return queue
+
+    def unsubscribe(self, tender_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(tender_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[tender_id]
+        if not self._subscribers:
+            self.close()
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    def publish(self, tender_id: str, bid: Dict[str, Any]):
+        """Publish a bid written by this process (no-op when change streams feed events)"""
+        if not self.use_change_streams:
+            self._fan_out(tender_id, bid)
+
+    def _fan_out(self, tender_id: str, bid: Dict[str, Any]):
+        for queue in self._subscribers.get(tender_id, ()):
+            if queue.full():
+                # Slow viewer: drop its oldest event rather than block everyone
+                queue.get_nowait()
+            queue.put_nowait(bid)
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        resume_token = None
+        while True:
+            try:
+                async with db.bid_submissions.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        document = change.get("fullDocument")
+                        if document and document.get("tender_id") in self._subscribers:
+                            self._fan_out(document["tender_id"], document)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if self._change_streams_unsupported(e):
+                    logger.warning(f"Bid change streams unsupported, falling back to in-process events: {str(e)}")
+                    self.use_change_streams = False
+                    self._watcher = None
+                    return
+                if e.code in self.HISTORY_LOST_ERROR_CODES:
+                    resume_token = None
+                logger.warning(f"Bid change stream failed, retrying: {str(e)}")
+            except Exception as e:
+                logger.warning(f"Bid change stream interrupted, resuming: {str(e)}")
+            await asyncio.sleep(self.retry_delay)
+
+    def _change_streams_unsupported(self, error: OperationFailure) -> bool:
+        return (
+            error.code in self.UNSUPPORTED_ERROR_CODES
+            or "replica set" in str(error).lower()
+        )
+
+
+bid_events = BidEventBroker(
+    use_change_streams=os.environ.get('BID_EVENTS_CHANGE_STREAMS', 'false').lower() == 'true'
+)
+BID_EVENTS_KEEPALIVE_SECONDS = 15
+
+
+def serialize_bid_event(bid: Dict[str, Any]) -> Dict[str, Any]:
+    return jsonable_encoder(BidSubmission(**bid))
+
+
+# Response compression
+class CompressionMiddleware:
+    """Compress complete response bodies with brotli or gzip.
+
+    Only single-message bodies of at least ``minimum_size`` bytes are
+    compressed; streaming responses (such as the bid event feed) pass
+    through untouched so events are not held back in a buffer.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, encodings: List[str] = None,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        encodings = encodings if encodings is not None else ["br", "gzip"]
+        self.encodings = [e for e in encodings if e == "gzip" or (e == "br" and brotli is not None)]
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = self.accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        encoding = next((e for e in self.encodings if e in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith("text/event-stream")
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def accepted_encodings(accept_encoding: str) -> Set[str]:
+        accepted = set()
+        for item in accept_encoding.lower().split(","):
+            name, _, params = item.partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(name.strip())
+        return accepted
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+
+# Conditional requests for list endpoints
+async def bump_collection_version(collection_name: str):
+    """Record a write to a collection so cached list ETags are invalidated.
+
+    Best effort: the write it follows has already happened, and failing the
+    request now would make the client retry it and write twice.
+    """
     try:
-        if filename.endswith('.xlsx'):
-            # Handle .xlsx files
-            workbook = openpyxl.load_workbook(io.BytesIO(file_content))
-            sheet = workbook.active
-            
-            # Assuming the Excel has headers in the first row
-            headers = []
-            for cell in sheet[1]:
-                headers.append(cell.value)
-            
-            # Process data rows
-            for row_num in range(2, sheet.max_row + 1):
-                row_data = {}
-                for col_num, header in enumerate(headers, 1):
-                    cell_value = sheet.cell(row=row_num, column=col_num).value
-                    if header:
-                        row_data[header.lower().strip()] = cell_value
-                
-                # Create WorkItem from row data
-                if row_data.get('work_no') or row_data.get('work_description'):
-                    work_item = WorkItem(
-                        work_no=str(row_data.get('work_no', f'WORK_{row_num-1}')),
-                        work_description=str(row_data.get('work_description', '')),
-                        estimated_cost=float(row_data.get('estimated_cost', 0)) if row_data.get('estimated_cost') else None,
-                        completion_time=str(row_data.get('completion_time', '')) if row_data.get('completion_time') else None,
-                        location=str(row_data.get('location', '')) if row_data.get('location') else None,
-                        category=str(row_data.get('category', '')) if row_data.get('category') else None
-                    )
-                    work_items.append(work_item)
-                    
-        elif filename.endswith('.xls'):
-            # Handle .xls files
-            workbook = xlrd.open_workbook(file_contents=file_content)
-            sheet = workbook.sheet_by_index(0)
-            
-            # Get headers from first row
-            headers = []
-            for col in range(sheet.ncols):
-                headers.append(sheet.cell_value(0, col))
-            
-            # Process data rows
-            for row_num in range(1, sheet.nrows):
-                row_data = {}
-                for col_num, header in enumerate(headers):
-                    cell_value = sheet.cell_value(row_num, col_num)
-                    if header:
-                        row_data[header.lower().strip()] = cell_value
-                
-                # Create WorkItem from row data
-                if row_data.get('work_no') or row_data.get('work_description'):
-                    work_item = WorkItem(
-                        work_no=str(row_data.get('work_no', f'WORK_{row_num}')),
-                        work_description=str(row_data.get('work_description', '')),
-                        estimated_cost=float(row_data.get('estimated_cost', 0)) if row_data.get('estimated_cost') else None,
-                        completion_time=str(row_data.get('completion_time', '')) if row_data.get('completion_time') else None,
-                        location=str(row_data.get('location', '')) if row_data.get('location') else None,
-                        category=str(row_data.get('category', '')) if row_data.get('category') else None
-                    )
-                    work_items.append(work_item)
-                    
+        await db.collection_versions.update_one(
+            {"_id": collection_name}, {"$inc": {"version": 1}}, upsert=True
+        )
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error parsing Excel file: {str(e)}")
-    
-    return work_items
+        logger.warning(f"Could not bump version of {collection_name}, list ETags may be stale: {str(e)}")
+
+async def collection_etag(collection_name: str) -> str:
+    # Read the version before the data it describes: a concurrent write can
+    # then only make the ETag older than the body, never newer.
+    version_doc = await db.collection_versions.find_one({"_id": collection_name})
+    version = version_doc["version"] if version_doc else 0
+    return f'W/"{collection_name}-{version}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+# Rate limiting and admission control
+class RateLimitBackend(ABC):
+    """Token bucket storage. ``consume`` takes one token from the bucket at
+    ``key`` and returns 0 when allowed, otherwise the seconds until the
+    next token is available."""
+
+    async def setup(self):
+        pass
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, capacity: int) -> float:
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets; limits are multiplied by the number of workers.
+
+    At most ``max_keys`` buckets are kept; the least recently used one is
+    evicted first, so clients cannot grow the table by inventing keys.
+    """
+
+    def __init__(self, max_keys: int = 10000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, capacity: int) -> float:
+        now = self.clock()
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / rate
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """Buckets shared by all workers, updated atomically in the rate_limits collection"""
+
+    def __init__(self, expire_after_seconds: int = 3600):
+        self.expire_after_seconds = expire_after_seconds
+        self._index_ready = False
+
+    async def setup(self):
+        self._index_ready = await ensure_ttl_index("rate_limits", "updated_at", self.expire_after_seconds)
+
+    async def consume(self, key: str, rate: float, capacity: int) -> float:
+        if not self._index_ready:
+            await self.setup()
+        # $$NOW is the server's clock, so skew between workers cannot drain buckets
+        elapsed_seconds = {"$max": [0, {"$divide": [
+            {"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000
+        ]}]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed_seconds, rate]}]}]}
+        bucket = await db.rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return 0.0 if bucket["allowed"] else (1 - bucket["tokens"]) / rate
+
+
+class RateLimiter:
+    """Token bucket policy: ``per_minute`` sustained requests with bursts up to ``burst``"""
+
+    def __init__(self, name: str, per_minute: float, burst: int, backend: RateLimitBackend):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.backend = backend
+
+    async def hit(self, identity: str):
+        retry_after = await self.backend.consume(f"{self.name}:{identity}", self.rate, self.burst)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'mongo':
+    rate_limit_backend = MongoRateLimitBackend()
+else:
+    rate_limit_backend = InMemoryRateLimitBackend()
+
+client_ip_limiter = RateLimiter(
+    "ip",
+    per_minute=float(os.environ.get('RATE_LIMIT_IP_PER_MINUTE', '120')),
+    burst=int(os.environ.get('RATE_LIMIT_IP_BURST', '30')),
+    backend=rate_limit_backend,
+)
+bidder_limiter = RateLimiter(
+    "bidder",
+    per_minute=float(os.environ.get('RATE_LIMIT_BIDDER_PER_MINUTE', '30')),
+    burst=int(os.environ.get('RATE_LIMIT_BIDDER_BURST', '10')),
+    backend=rate_limit_backend,
+)
+# Excel parsing is CPU heavy; cap how many uploads one worker handles at once
+upload_slots = asyncio.Semaphore(int(os.environ.get('UPLOAD_MAX_CONCURRENCY', '4')))
+UPLOAD_RETRY_AFTER_SECONDS = 5
+
+
+async def limit_client_ip(request: Request):
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    await client_ip_limiter.hit(request.client.host if request.client else "unknown")
+
+async def acquire_upload_slot():
+    if upload_slots.locked():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many uploads in progress, please retry later",
+            headers={"Retry-After": str(UPLOAD_RETRY_AFTER_SECONDS)},
+        )
+    async with upload_slots:
+        yield
+
+
+# Idempotency keys for retried writes
+class IdempotencyStore:
+    """Run each ``Idempotency-Key`` once and replay its stored response on retries.
+
+    Keys live in the idempotency_keys collection, expired by a TTL index.
+    A retry that arrives while the original request is still running waits
+    for it to finish (on any worker) instead of being processed again.
+    """
+
+    def __init__(self, ttl_seconds: int = 86400, wait_seconds: float = 30,
+                 lock_timeout_seconds: float = 120, poll_interval: float = 0.25):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.lock_timeout = timedelta(seconds=lock_timeout_seconds)
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[str, asyncio.Event] = {}
+        self._pending_stores: Set[asyncio.Task] = set()
+        self._index_ready = False
+
+    async def setup(self):
+        self._index_ready = await ensure_ttl_index("idempotency_keys", "created_at", self.ttl_seconds)
+
+    async def run(self, scope: str, key: Optional[str], request_data: Dict[str, Any], handler):
+        """Return ``await handler()`` for a new key, or the stored response for a repeat"""
+        if key is None:
+            return await handler()
+        if not 0 < len(key) <= 255:
+            raise HTTPException(status_code=400, detail="Idempotency-Key must be 1-255 characters")
+        if not self._index_ready:
+            await self.setup()
+
+        record_id = f"{scope}:{key}"
+        completed, locked_at = await self._acquire(record_id, self.fingerprint(request_data))
+        if completed is not None:
+            return JSONResponse(
+                status_code=completed["status_code"],
+                content=completed["response"],
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        # Every write below is conditional on still holding our claim
+        claim = {"_id": record_id, "status": "in_progress", "locked_at": locked_at}
+        in_flight = self._in_flight[record_id] = asyncio.Event()
+        try:
+            result = await handler()
+        except BaseException:
+            # Failed requests are not recorded, so the client may retry them
+            await db.idempotency_keys.delete_one(claim)
+            raise
+        else:
+            response = jsonable_encoder(result)
+            try:
+                await self._store_response(claim, response)
+            except Exception as e:
+                # The write already happened: keep the claim and retry storing the
+                # response before the lock times out, so a retry is never re-run
+                logger.warning(f"Storing response for idempotency key {record_id} failed, retrying: {str(e)}")
+                task = asyncio.create_task(self._retry_store_response(claim, response))
+                self._pending_stores.add(task)
+                task.add_done_callback(self._pending_stores.discard)
+            return result
+        finally:
+            if self._in_flight.get(record_id) is in_flight:
+                del self._in_flight[record_id]
+            in_flight.set()
+
+    @staticmethod
+    def fingerprint(request_data: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(jsonable_encoder(request_data), sort_keys=True).encode()
+        ).hexdigest()
+
+    async def _store_response(self, claim: Dict[str, Any], response: Any):
+        result = await db.idempotency_keys.update_one(
+            claim,
+            {"$set": {"status": "completed", "status_code": 200, "response": response}},
+        )
+        if result.matched_count == 0:
+            logger.warning(f"Idempotency key {claim['_id']} was taken over while its request was running")
+
+    async def _retry_store_response(self, claim: Dict[str, Any], response: Any):
+        deadline = time.monotonic() + self.lock_timeout.total_seconds()
+        delay = self.poll_interval
+        while time.monotonic() + delay < deadline:
+            await asyncio.sleep(delay)
+            try:
+                await self._store_response(claim, response)
+                return
+            except Exception as e:
+                logger.warning(f"Storing response for idempotency key {claim['_id']} failed again: {str(e)}")
+            delay = min(delay * 2, 10)
+        logger.error(f"Gave up storing response for idempotency key {claim['_id']}; a retry may be processed again")
+
+    async def _acquire(self, record_id: str, fingerprint: str) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Return (completed record, None) for a repeat, or (None, lock time) once claimed"""
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            # Mongo stores dates to the millisecond; match what it will return
+            now = datetime.utcnow()
+            now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+            try:
+                await db.idempotency_keys.insert_one({
+                    "_id": record_id,
+                    "fingerprint": fingerprint,
+                    "status": "in_progress",
+                    "created_at": now,
+                    "locked_at": now,
+                })
+                return None, now
+            except DuplicateKeyError:
+                record = await db.idempotency_keys.find_one({"_id": record_id})
+
+            if record is None:
+                continue  # the original request failed and released the key
+            if record["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            if record["status"] == "completed":
+                return record, None
+            if now - record["locked_at"] > self.lock_timeout:
+                # The worker handling the original request died; take the key over
+                taken = await db.idempotency_keys.find_one_and_update(
+                    {"_id": record_id, "status": "in_progress", "locked_at": record["locked_at"]},
+                    {"$set": {"locked_at": now}},
+                )
+                if taken:
+                    return None, now
+                continue
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still being processed",
+                    headers={"Retry-After": str(math.ceil(self.poll_interval * 4))},
+                )
+
+            in_flight = self._in_flight.get(record_id)
+            if in_flight is None:
+                await asyncio.sleep(self.poll_interval)
+            else:
+                try:
+                    await asyncio.wait_for(in_flight.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400')),
+    wait_seconds=float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '30')),
+)
 
 
 # API Endpoints
@@ -193,27 +771,53 @@ def parse_excel_file(file_content: bytes, filename: str) -> List[WorkItem]:
 async def root():
     return {"message": "Tender Management System API"}
 
+@api_router.get("/health")
+async def health_check():
+    """Readiness probe: database reachability and connection pool statistics"""
+    ready = db is not None and await ping_database(timeout=2.0)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ok" if ready else "unavailable",
+            "database": os.environ.get('DB_NAME'),
+            "pid": os.getpid(),
+            "pool": {
+                "max_size": client.options.pool_options.max_pool_size if client is not None else None,
+                **pool_stats.snapshot(),
+            },
+        },
+    )
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
     _ = await db.status_checks.insert_one(status_obj.dict())
+    await bump_collection_version("status_checks")
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
+async def get_status_checks(request: Request, response: Response):
+    etag = await collection_etag("status_checks")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
 # Tender Notice Management
-@api_router.post("/tender-notices/upload-excel")
+@api_router.post(
+    "/tender-notices/upload-excel",
+    dependencies=[Depends(limit_client_ip), Depends(acquire_upload_slot)],
+)
 async def upload_tender_excel(
     file: UploadFile = File(...),
     tender_no: str = Form(...),
     notice_title: str = Form(...),
     organization: str = Form(None),
     publication_date: str = Form(None),
-    last_date_submission: str = Form(None)
+    last_date_submission: str = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Upload Excel file with tender notice and work items"""
     
@@ -221,40 +825,58 @@ async def upload_tender_excel(
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are supported")
     
-    try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Parse Excel file to extract work items
-        work_items = parse_excel_file(file_content, file.filename)
-        
-        # Create tender notice
-        tender_notice = TenderNotice(
-            tender_no=tender_no,
-            notice_title=notice_title,
-            organization=organization,
-            publication_date=datetime.fromisoformat(publication_date) if publication_date else None,
-            last_date_submission=datetime.fromisoformat(last_date_submission) if last_date_submission else None,
-            work_items=work_items,
-            excel_file_name=file.filename
-        )
-        
-        # Save to database
-        result = await db.tender_notices.insert_one(tender_notice.dict())
-        
-        return {
-            "message": "Tender notice uploaded successfully",
-            "tender_id": tender_notice.id,
-            "work_items_count": len(work_items),
-            "work_items": [item.dict() for item in work_items]
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    # Read file content
+    file_content = await file.read()
+    request_data = {
+        "tender_no": tender_no,
+        "notice_title": notice_title,
+        "organization": organization,
+        "publication_date": publication_date,
+        "last_date_submission": last_date_submission,
+        "file_name": file.filename,
+        "file_sha256": hashlib.sha256(file_content).hexdigest(),
+    }
+
+    async def process_upload():
+        try:
+            # Parse Excel file to extract work items
+            # Parse off the event loop so slow workbooks don't stall other requests
+            work_items = await run_in_threadpool(parse_excel_file, file_content, file.filename)
+            
+            # Create tender notice
+            tender_notice = TenderNotice(
+                tender_no=tender_no,
+                notice_title=notice_title,
+                organization=organization,
+                publication_date=datetime.fromisoformat(publication_date) if publication_date else None,
+                last_date_submission=datetime.fromisoformat(last_date_submission) if last_date_submission else None,
+                work_items=work_items,
+                excel_file_name=file.filename
+            )
+            
+            # Save to database
+            result = await db.tender_notices.insert_one(tender_notice.dict())
+            await bump_collection_version("tender_notices")
+            
+            return {
+                "message": "Tender notice uploaded successfully",
+                "tender_id": tender_notice.id,
+                "work_items_count": len(work_items),
+                "work_items": [item.dict() for item in work_items]
+            }
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+    return await idempotency_store.run("tender-upload", idempotency_key, request_data, process_upload)
 
 @api_router.get("/tender-notices", response_model=List[TenderNotice])
-async def get_tender_notices():
+async def get_tender_notices(request: Request, response: Response):
     """Get all tender notices"""
+    etag = await collection_etag("tender_notices")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     tender_notices = await db.tender_notices.find().to_list(1000)
     return [TenderNotice(**notice) for notice in tender_notices]
 
@@ -272,6 +894,7 @@ async def delete_tender_notice(tender_id: str):
     result = await db.tender_notices.delete_one({"id": tender_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Tender notice not found")
+    await bump_collection_version("tender_notices")
     return {"message": "Tender notice deleted successfully"}
 
 # Bidder Management
@@ -281,13 +904,18 @@ async def create_bidder_profile(bidder: BidderProfileCreate):
     try:
         bidder_profile = BidderProfile(**bidder.dict())
         await db.bidder_profiles.insert_one(bidder_profile.dict())
+        await bump_collection_version("bidder_profiles")
         return bidder_profile
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating bidder profile: {str(e)}")
 
 @api_router.get("/bidders", response_model=List[BidderProfile])
-async def get_bidder_profiles():
+async def get_bidder_profiles(request: Request, response: Response):
     """Get all bidder profiles"""
+    etag = await collection_etag("bidder_profiles")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     bidders = await db.bidder_profiles.find().to_list(1000)
     return [BidderProfile(**bidder) for bidder in bidders]
 
@@ -310,6 +938,7 @@ async def update_bidder_profile(bidder_id: str, bidder: BidderProfileCreate):
         )
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Bidder not found")
+        await bump_collection_version("bidder_profiles")
         
         updated_bidder_doc = await db.bidder_profiles.find_one({"id": bidder_id})
         return BidderProfile(**updated_bidder_doc)
@@ -317,47 +946,130 @@ async def update_bidder_profile(bidder_id: str, bidder: BidderProfileCreate):
         raise HTTPException(status_code=500, detail=f"Error updating bidder profile: {str(e)}")
 
 # Bid Submission Management
-@api_router.post("/bids", response_model=BidSubmission)
-async def submit_bid(bid: BidSubmissionCreate):
+@api_router.post("/bids", response_model=BidSubmission, dependencies=[Depends(limit_client_ip)])
+async def submit_bid(
+    bid: BidSubmissionCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Submit a bid for a work item"""
     
-    try:
-        # Verify tender and work item exist
-        tender_notice = await db.tender_notices.find_one({"id": bid.tender_id})
-        if not tender_notice:
-            raise HTTPException(status_code=404, detail="Tender notice not found")
-        
-        # Check if work item exists in the tender
-        work_item_exists = any(item['id'] == bid.work_item_id for item in tender_notice.get('work_items', []))
-        if not work_item_exists:
-            raise HTTPException(status_code=404, detail="Work item not found in this tender")
-        
-        # Verify bidder exists
-        bidder = await db.bidder_profiles.find_one({"id": bid.bidder_id})
-        if not bidder:
-            raise HTTPException(status_code=404, detail="Bidder not found")
-        
-        bid_submission = BidSubmission(**bid.dict())
-        await db.bid_submissions.insert_one(bid_submission.dict())
-        return bid_submission
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error submitting bid: {str(e)}")
+    async def process_bid():
+        # Charged only when the bid is processed, not when a retry is replayed
+        await bidder_limiter.hit(bid.bidder_id)
+        try:
+            # Verify tender and work item exist
+            tender_notice = await db.tender_notices.find_one({"id": bid.tender_id})
+            if not tender_notice:
+                raise HTTPException(status_code=404, detail="Tender notice not found")
+            
+            # Check if work item exists in the tender
+            work_item_exists = any(item['id'] == bid.work_item_id for item in tender_notice.get('work_items', []))
+            if not work_item_exists:
+                raise HTTPException(status_code=404, detail="Work item not found in this tender")
+            
+            # Verify bidder exists
+            bidder = await db.bidder_profiles.find_one({"id": bid.bidder_id})
+            if not bidder:
+                raise HTTPException(status_code=404, detail="Bidder not found")
+            
+            bid_submission = BidSubmission(**bid.dict())
+            await db.bid_submissions.insert_one(bid_submission.dict())
+            await bump_collection_version("bid_submissions")
+            try:
+                bid_events.publish(bid_submission.tender_id, bid_submission.dict())
+            except Exception as e:
+                # The bid is stored; a missed live event must not fail the request
+                logger.warning(f"Could not publish bid {bid_submission.id}: {str(e)}")
+            return bid_submission
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error submitting bid: {str(e)}")
+
+    return await idempotency_store.run("bids", idempotency_key, bid.dict(), process_bid)
 
 @api_router.get("/bids/tender/{tender_id}")
-async def get_bids_for_tender(tender_id: str):
+async def get_bids_for_tender(tender_id: str, request: Request, response: Response):
     """Get all bids for a specific tender"""
+    etag = await collection_etag("bid_submissions")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     bids = await db.bid_submissions.find({"tender_id": tender_id}).to_list(1000)
     return [BidSubmission(**bid) for bid in bids]
 
+@api_router.get("/bids/tender/{tender_id}/stream")
+async def stream_bids_for_tender(tender_id: str, request: Request):
+    """Server-Sent Events feed of new and updated bids for a tender"""
+    queue = bid_events.subscribe(tender_id)
+
+    async def event_stream():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    bid = await asyncio.wait_for(queue.get(), timeout=BID_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                event = serialize_bid_event(bid)
+                yield f"id: {event['id']}\nevent: bid\ndata: {json.dumps(event)}\n\n"
+        finally:
+            bid_events.unsubscribe(tender_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.websocket("/bids/tender/{tender_id}/ws")
+async def websocket_bids_for_tender(websocket: WebSocket, tender_id: str):
+    """WebSocket feed of new and updated bids for a tender"""
+    await websocket.accept()
+    queue = bid_events.subscribe(tender_id)
+
+    async def forward_bids():
+        while True:
+            bid = await queue.get()
+            await websocket.send_json(serialize_bid_event(bid))
+
+    async def watch_client():
+        # Reading is only used to notice the client going away
+        while True:
+            await websocket.receive_text()
+
+    tasks = {asyncio.create_task(forward_bids()), asyncio.create_task(watch_client())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.warning(f"Bid feed for tender {tender_id} closed: {str(error)}")
+                try:
+                    await websocket.close(code=1011)
+                except Exception:
+                    pass  # the socket is already gone
+    finally:
+        for task in tasks:
+            task.cancel()
+        bid_events.unsubscribe(tender_id, queue)
+
 @api_router.get("/bids/work-item/{work_item_id}")
-async def get_bids_for_work_item(work_item_id: str):
+async def get_bids_for_work_item(work_item_id: str, request: Request, response: Response):
     """Get all bids for a specific work item"""
+    etag = await collection_etag("bid_submissions")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     bids = await db.bid_submissions.find({"work_item_id": work_item_id}).to_list(1000)
     return [BidSubmission(**bid) for bid in bids]
 
 @api_router.get("/bids/bidder/{bidder_id}")
-async def get_bids_by_bidder(bidder_id: str):
+async def get_bids_by_bidder(bidder_id: str, request: Request, response: Response):
     """Get all bids submitted by a specific bidder"""
+    etag = await collection_etag("bid_submissions")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     bids = await db.bid_submissions.find({"bidder_id": bidder_id}).to_list(1000)
     return [BidSubmission(**bid) for bid in bids]
 
@@ -370,6 +1082,13 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MINIMUM_SIZE', '1024')),
+    encodings=[e.strip() for e in os.environ.get('COMPRESSION_ENCODINGS', 'br,gzip').split(',') if e.strip()],
 )
 
 # Configure logging
@@ -379,6 +1098,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Each worker is a separate process with its own MongoDB pool. Live bid
+    # feeds need BID_EVENTS_CHANGE_STREAMS=true to see other workers' bids.
+    uvicorn.run(
+        "server:app",
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', '8001')),
+        workers=int(os.environ.get('WEB_CONCURRENCY', '1')),
+    )
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire for tender list payloads, before and after response
+compression and ETag revalidation.
+
+Run from the repository root:  python benchmarks/bench_compression.py
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.server import (  # noqa: E402
+    CompressionMiddleware,
+    TenderNotice,
+    WorkItem,
+    brotli,
+    etag_matches,
+    not_modified,
+    set_etag,
+)
+
+ETAG = 'W/"tender_notices-42"'
+
+
+def build_tender_list(tenders: int, works_per_tender: int):
+    return [
+        TenderNotice(
+            tender_no=f"NIT/{t:03d}/2025-26",
+            notice_title=f"Construction and maintenance works, division {t}",
+            organization="Public Works Department",
+            excel_file_name=f"NIT_{t} works.xlsx",
+            work_items=[
+                WorkItem(
+                    work_no=f"{t}.{w}",
+                    work_description=f"Strengthening and resurfacing of road section {w} including drainage",
+                    estimated_cost=250000.0 + w * 1375.5,
+                    completion_time="6 months",
+                    location=f"Block {w % 7}",
+                    category="Roads",
+                )
+                for w in range(works_per_tender)
+            ],
+        )
+        for t in range(tenders)
+    ]
+
+
+def build_app(payload, **middleware_options):
+    app = FastAPI()
+
+    @app.get("/tender-notices")
+    async def tender_notices(request: Request, response: Response):
+        if etag_matches(request, ETAG):
+            return not_modified(ETAG)
+        set_etag(response, ETAG)
+        return payload
+
+    app.add_middleware(CompressionMiddleware, **middleware_options)
+    return app
+
+
+def wire_bytes(client: TestClient, accept_encoding: str, if_none_match: str = None) -> int:
+    headers = {"Accept-Encoding": accept_encoding}
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match
+    with client.stream("GET", "/tender-notices", headers=headers) as response:
+        response.read()
+        return response.num_bytes_downloaded
+
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"{'payload':<22}{'identity':>12}{'gzip':>12}{'br':>12}{'304':>8}")
+    for tenders, works in [(1, 10), (10, 10), (50, 25), (200, 25)]:
+        client = TestClient(build_app(build_tender_list(tenders, works)))
+        identity = wire_bytes(client, "identity")
+        gzipped = wire_bytes(client, "gzip")
+        brotlied = wire_bytes(client, "br") if brotli is not None else None
+        revalidated = wire_bytes(client, "br, gzip", if_none_match=ETAG)
+        label = f"{tenders} tenders x {works}"
+        br_column = f"{brotlied:>12}" if brotlied is not None else f"{'n/a':>12}"
+        print(f"{label:<22}{identity:>12}{gzipped:>12}{br_column}{revalidated:>8}")
+
+
+if __name__ == "__main__":
+    main()
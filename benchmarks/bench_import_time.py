@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Cold-start import profile for the API process, based on ``python -X importtime``.
+
+Each target module is imported in a fresh interpreter and the cumulative
+import time of the module and its slowest dependencies is reported.
+
+Run from the repository root:  python benchmarks/bench_import_time.py [--json]
+"""
+
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+TARGETS = ["backend.excel_parser", "backend.server"]
+# Imported only when a workbook is parsed, never at startup
+LAZY_MODULES = ["openpyxl", "xlrd"]
+TOP_N = 10
+RUNS = 5
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_import(module: str):
+    """Return (cumulative_us of module, {direct dependency: cumulative_us}, loaded modules)"""
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    # Children are printed before their parent, indented two spaces per level
+    total_us, dependencies, pending = 0, {}, {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        level = (len(indent) - 1) // 2
+        if level == 1:
+            pending[name] = int(cumulative_us)
+        elif level == 0:
+            if name == module:
+                total_us, dependencies = int(cumulative_us), pending
+            pending = {}
+    loaded = set(result.stdout.strip().split(","))
+    return total_us, dependencies, loaded
+
+
+def main():
+    report = {}
+    for target in TARGETS:
+        runs = [profile_import(target) for _ in range(RUNS)]
+        totals = sorted(total for total, _, _ in runs)
+        _, dependencies, loaded = runs[0]
+        report[target] = {
+            "median_total_ms": totals[len(totals) // 2] / 1000,
+            "slowest_imports_ms": {
+                name: us / 1000
+                for name, us in sorted(dependencies.items(), key=lambda item: -item[1])[:TOP_N]
+            },
+            "eager_heavy_imports": [m for m in LAZY_MODULES if m in loaded],
+        }
+
+    if "--json" in sys.argv:
+        print(json.dumps(report, indent=2))
+        return
+
+    for target, result in report.items():
+        print(f"{target}: {result['median_total_ms']:.1f} ms (median of {RUNS})")
+        for name, ms in result["slowest_imports_ms"].items():
+            print(f"  {ms:8.1f} ms  {name}")
+        eager = ", ".join(result["eager_heavy_imports"]) or "none"
+        print(f"  eagerly imported parsers: {eager}\n")
+
+
+if __name__ == "__main__":
+    main()
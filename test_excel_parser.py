@@ -1,5 +1,5 @@
 import os
-from backend.server import parse_excel_file
+from backend.excel_parser import parse_excel_file
 
 def test_excel_parsing():
     test_files_dir = "TEST_FILES"
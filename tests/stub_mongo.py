@@ -0,0 +1,97 @@
+"""Minimal in-memory stand-in for the Motor database used by server.py tests"""
+
+import copy
+from types import SimpleNamespace
+
+from pymongo.errors import DuplicateKeyError
+
+
+def matches(document, query):
+    return all(document.get(field) == value for field, value in query.items())
+
+
+class StubCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class StubCollection:
+    def __init__(self, database=None):
+        self.database = database
+        self.documents = []
+
+    def find(self, query=None):
+        return StubCursor([copy.deepcopy(d) for d in self.documents if matches(d, query or {})])
+
+    async def find_one(self, query):
+        for document in self.documents:
+            if matches(document, query):
+                return copy.deepcopy(document)
+        return None
+
+    async def insert_one(self, document):
+        if "_id" in document and any(d.get("_id") == document["_id"] for d in self.documents):
+            raise DuplicateKeyError(f"duplicate key: {document['_id']}")
+        self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document.get("_id"))
+
+    async def update_one(self, query, update, upsert=False):
+        for document in self.documents:
+            if matches(document, query):
+                self._apply(document, update)
+                return SimpleNamespace(matched_count=1)
+        if upsert:
+            document = dict(query)
+            self._apply(document, update)
+            self.documents.append(document)
+        return SimpleNamespace(matched_count=0)
+
+    async def find_one_and_update(self, query, update):
+        for document in self.documents:
+            if matches(document, query):
+                before = copy.deepcopy(document)
+                self._apply(document, update)
+                return before
+        return None
+
+    async def delete_one(self, query):
+        for document in self.documents:
+            if matches(document, query):
+                self.documents.remove(document)
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def create_index(self, *args, **kwargs):
+        if self.database is not None and self.database.ping_error:
+            raise self.database.ping_error
+        return "index"
+
+    @staticmethod
+    def _apply(document, update):
+        for field, value in update.get("$set", {}).items():
+            document[field] = value
+        for field, value in update.get("$inc", {}).items():
+            document[field] = document.get(field, 0) + value
+
+
+class StubDatabase:
+    def __init__(self):
+        self._collections = {}
+        # Set to an exception to make the database unreachable for pings and index builds
+        self.ping_error = None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._collections.setdefault(name, StubCollection(self))
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    async def command(self, name):
+        if self.ping_error:
+            raise self.ping_error
+        return {"ok": 1}
@@ -0,0 +1,189 @@
+import asyncio
+from types import SimpleNamespace
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from backend import server
+from backend.server import BidEventBroker, BidSubmission
+
+
+def test_publish_fans_out_to_all_viewers_of_a_tender():
+    async def scenario():
+        broker = BidEventBroker()
+        first = broker.subscribe("T1")
+        second = broker.subscribe("T1")
+        other = broker.subscribe("T2")
+
+        broker.publish("T1", {"id": "B1", "tender_id": "T1"})
+
+        assert (await first.get())["id"] == "B1"
+        assert (await second.get())["id"] == "B1"
+        assert other.empty()
+
+    asyncio.run(scenario())
+
+
+def test_unsubscribe_releases_tender_subscription():
+    async def scenario():
+        broker = BidEventBroker()
+        queue = broker.subscribe("T1")
+        broker.unsubscribe("T1", queue)
+
+        assert broker._subscribers == {}
+        broker.publish("T1", {"id": "B1", "tender_id": "T1"})
+        assert queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_viewer_drops_oldest_event():
+    async def scenario():
+        broker = BidEventBroker(queue_size=2)
+        queue = broker.subscribe("T1")
+        for bid_id in ("B1", "B2", "B3"):
+            broker.publish("T1", {"id": bid_id, "tender_id": "T1"})
+
+        assert [(await queue.get())["id"] for _ in range(2)] == ["B2", "B3"]
+
+    asyncio.run(scenario())
+
+
+class StubChangeStream:
+    def __init__(self, changes, error=None):
+        self.changes = changes
+        self.error = error
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for token, document in self.changes:
+            self.resume_token = token
+            yield {"fullDocument": document}
+        if self.error:
+            raise self.error
+        await asyncio.Event().wait()  # stay open like a live stream
+
+
+class StubBidCollection:
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.resume_tokens = []
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        self.resume_tokens.append(resume_after)
+        stream = self.streams.pop(0)
+        if isinstance(stream, Exception):
+            raise stream
+        return stream
+
+
+def install_stub_db(monkeypatch, collection):
+    monkeypatch.setattr(server, "db", SimpleNamespace(bid_submissions=collection))
+
+
+def test_change_stream_resumes_after_transient_error(monkeypatch):
+    collection = StubBidCollection([
+        StubChangeStream([("token-1", {"id": "B1", "tender_id": "T1"})], error=AutoReconnect("connection reset")),
+        StubChangeStream([("token-2", {"id": "B2", "tender_id": "T1"})]),
+    ])
+    install_stub_db(monkeypatch, collection)
+
+    async def scenario():
+        broker = BidEventBroker(use_change_streams=True, retry_delay=0)
+        queue = broker.subscribe("T1")
+
+        assert (await asyncio.wait_for(queue.get(), 1))["id"] == "B1"
+        assert (await asyncio.wait_for(queue.get(), 1))["id"] == "B2"
+        assert broker.use_change_streams
+        broker.close()
+
+    asyncio.run(scenario())
+    assert collection.resume_tokens == [None, "token-1"]
+
+
+def test_one_change_stream_feeds_every_watched_tender(monkeypatch):
+    collection = StubBidCollection([
+        StubChangeStream([
+            ("token-1", {"id": "B1", "tender_id": "T1"}),
+            ("token-2", {"id": "B2", "tender_id": "T9"}),
+            ("token-3", {"id": "B3", "tender_id": "T2"}),
+        ]),
+    ])
+    install_stub_db(monkeypatch, collection)
+
+    async def scenario():
+        broker = BidEventBroker(use_change_streams=True, retry_delay=0)
+        first = broker.subscribe("T1")
+        second = broker.subscribe("T2")
+        also_first = broker.subscribe("T1")
+
+        assert (await asyncio.wait_for(first.get(), 1))["id"] == "B1"
+        assert (await asyncio.wait_for(also_first.get(), 1))["id"] == "B1"
+        assert (await asyncio.wait_for(second.get(), 1))["id"] == "B3"
+        assert first.empty() and second.empty()
+
+        for tender_id, queue in (("T1", first), ("T1", also_first), ("T2", second)):
+            broker.unsubscribe(tender_id, queue)
+        assert broker._watcher is None
+
+    asyncio.run(scenario())
+    assert len(collection.resume_tokens) == 1
+
+
+def test_unsupported_change_streams_fall_back_to_in_process_events(monkeypatch):
+    unsupported = OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+    install_stub_db(monkeypatch, StubBidCollection([unsupported]))
+
+    async def scenario():
+        broker = BidEventBroker(use_change_streams=True, retry_delay=0)
+        queue = broker.subscribe("T1")
+        await asyncio.sleep(0.01)
+
+        assert not broker.use_change_streams
+        broker.publish("T1", {"id": "B1", "tender_id": "T1"})
+        assert (await queue.get())["id"] == "B1"
+
+    asyncio.run(scenario())
+
+
+class BrokenWebSocket:
+    def __init__(self):
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        raise RuntimeError("send on closed socket")
+
+    async def receive_text(self):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def test_websocket_feed_closes_when_sending_fails(monkeypatch):
+    broker = BidEventBroker()
+    monkeypatch.setattr(server, "bid_events", broker)
+    bid = BidSubmission(tender_id="T1", work_item_id="W1", bidder_id="B1", quoted_amount=100.0).dict()
+
+    async def scenario():
+        websocket = BrokenWebSocket()
+        feed = asyncio.create_task(server.websocket_bids_for_tender(websocket, "T1"))
+        await asyncio.sleep(0)
+        broker.publish("T1", bid)
+
+        await asyncio.wait_for(feed, 1)
+        assert websocket.close_code == 1011
+        assert broker._subscribers == {}
+
+    asyncio.run(scenario())
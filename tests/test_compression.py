@@ -0,0 +1,54 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.server import CompressionMiddleware
+
+
+def build_client(**options):
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse("tender " * 500)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("tender")
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            yield "data: one\n\n" * 200
+            yield "data: two\n\n" * 200
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, **options)
+    return TestClient(app)
+
+
+def test_large_body_is_gzipped_above_threshold():
+    client = build_client(minimum_size=100, encodings=["gzip"])
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(raw).decode() == "tender " * 500
+
+
+def test_small_body_and_unaccepted_encodings_are_not_compressed():
+    client = build_client(minimum_size=100, encodings=["gzip"])
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "gzip;q=0"}).headers
+
+
+def test_event_streams_pass_through_uncompressed():
+    client = build_client(minimum_size=100, encodings=["gzip"])
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text.startswith("data: one")
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from backend import server
+from tests.stub_mongo import StubDatabase
+
+BIDDER = {
+    "company_name": "Acme Builders",
+    "contact_person": "A. Kumar",
+    "email": "acme@example.com",
+    "phone": "9999999999",
+    "address": "Jaipur",
+}
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    db = StubDatabase()
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def test_list_endpoint_returns_304_until_collection_changes(stub_db):
+    client = TestClient(server.app)
+
+    first = client.get("/api/bidders")
+    assert first.status_code == 200
+    assert first.headers["etag"] == 'W/"bidder_profiles-0"'
+
+    repeat = client.get("/api/bidders", headers={"If-None-Match": first.headers["etag"]})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+    assert client.post("/api/bidders", json=BIDDER).status_code == 200
+
+    changed = client.get("/api/bidders", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == 'W/"bidder_profiles-1"'
+    assert [bidder["company_name"] for bidder in changed.json()] == ["Acme Builders"]
+
+
+def test_collection_etag_follows_version_counter(stub_db):
+    async def scenario():
+        assert await server.collection_etag("tender_notices") == 'W/"tender_notices-0"'
+        await server.bump_collection_version("tender_notices")
+        await server.bump_collection_version("tender_notices")
+        assert await server.collection_etag("tender_notices") == 'W/"tender_notices-2"'
+        assert await server.collection_etag("bid_submissions") == 'W/"bid_submissions-0"'
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ('W/"bids-3"', True),
+    ('"bids-3"', True),
+    ('W/"bids-2", W/"bids-3"', True),
+    ("*", True),
+    ('W/"bids-4"', False),
+])
+def test_etag_matches_uses_weak_comparison(if_none_match, expected):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    request = Request({"type": "http", "headers": headers})
+
+    assert server.etag_matches(request, 'W/"bids-3"') is expected
@@ -0,0 +1,144 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from backend import excel_parser
+from backend.excel_parser import detect_header_row, parse_excel_file
+
+TEST_FILES_DIR = Path(__file__).resolve().parent.parent / "TEST_FILES"
+
+
+@pytest.fixture(autouse=True)
+def empty_layout_cache():
+    excel_parser._layout_cache.clear()
+    yield
+    excel_parser._layout_cache.clear()
+
+
+def build_workbook(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_plain_header_in_first_row_still_parses():
+    content = build_workbook([
+        ["work_no", "work_description", "estimated_cost", "completion_time", "location", "category"],
+        ["WORK001", "Road Construction Phase 1", 500000, "6 months", "Mumbai", "Infrastructure"],
+    ])
+
+    [item] = parse_excel_file(content, "plain.xlsx")
+
+    assert item.work_no == "WORK001"
+    assert item.estimated_cost == 500000
+    assert item.location == "Mumbai"
+    assert item.category == "Infrastructure"
+
+
+def test_offset_header_with_different_wording_and_units():
+    content = build_workbook([
+        ["NOTICE INVITING TENDER", None, None],
+        ["NIT NUMBER", None, "07/2025-26"],
+        [],
+        ["S.No.", "Name of Work", "Estimated Cost (Rs. in Lakhs)", "Period of Completion (Days)"],
+        [1, "Repair of culvert", 2.5, 90],
+        [2, "Boundary wall", "1.25", "2 months"],
+    ])
+
+    items = parse_excel_file(content, "offset.xlsx")
+
+    assert [item.work_description for item in items] == ["Repair of culvert", "Boundary wall"]
+    assert [item.estimated_cost for item in items] == [250000, 125000]
+    assert items[0].work_no == "1"
+    assert items[0].completion_time == "90 days"
+    assert items[1].completion_time == "2 months"
+
+
+def test_sample_nit_workbook_parses_all_works():
+    content = (TEST_FILES_DIR / "NIT_10 works.xlsx").read_bytes()
+
+    items = parse_excel_file(content, "NIT_10 works.xlsx")
+
+    assert len(items) == 10
+    assert items[0].work_description == "WORK 1"
+    assert items[0].estimated_cost == 185000
+    assert items[0].completion_time == "1 month"
+    assert items[1].completion_time == "4 months"
+
+
+def test_repeat_layout_skips_scoring(monkeypatch):
+    rows = [
+        ["Title row"],
+        ["Item No.", "Description of Work", "Time of Completion"],
+        [1, "Drain", "1 month"],
+    ]
+    header_row, mapping = detect_header_row(rows)
+    assert header_row == 1
+    assert mapping.columns == {"work_no": 0, "work_description": 1, "completion_time": 2}
+
+    def fail_scoring(row):
+        raise AssertionError("cached layout should not be scored again")
+
+    monkeypatch.setattr(excel_parser, "score_header_row", fail_scoring)
+    assert detect_header_row([["Another title"], *rows[1:]]) == (1, mapping)
+
+
+def test_sheet_without_a_header_yields_no_items():
+    content = build_workbook([["Just a note"], ["and nothing else", 42]])
+
+    assert parse_excel_file(content, "notes.xlsx") == []
+
+
+def test_single_column_layout_is_not_reused_for_other_sheets():
+    offset_sheet = [
+        ["Description"],
+        ["Tender for annual works"],
+        ["S.No.", "Name of Work", "Estimated Cost"],
+        [1, "Drain", 100],
+    ]
+    detect_header_row([["Description"], ["Road"]])
+
+    header_row, mapping = detect_header_row(offset_sheet)
+
+    assert header_row == 2
+    assert mapping.columns == {"work_no": 0, "work_description": 1, "estimated_cost": 2}
+
+
+def test_same_header_text_in_a_different_layout_is_detected_afresh(monkeypatch):
+    header = ["Sr No", "Description of Work", "Location"]
+    detect_header_row([header, [1, "Culvert", "Ajmer"]])
+    scored = []
+    real_score = excel_parser.score_header_row
+
+    def counting_score(row):
+        scored.append(row)
+        return real_score(row)
+
+    monkeypatch.setattr(excel_parser, "score_header_row", counting_score)
+    header_row, _ = detect_header_row([["NIT 4/2025"], [], header, [1, "Culvert", "Ajmer"]])
+
+    assert header_row == 2
+    assert scored
+
+
+def test_layout_cache_is_safe_across_threads(monkeypatch):
+    monkeypatch.setattr(excel_parser, "LAYOUT_CACHE_SIZE", 2)
+    layouts = [
+        [["Title"] * n, ["Item No", "Name of Work", "Location"], [1, "Drain", "Kota"]]
+        for n in range(1, 9)
+    ]
+
+    def detect_many():
+        return [detect_header_row(layout)[0] for _ in range(200) for layout in layouts]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [future.result() for future in [pool.submit(detect_many) for _ in range(8)]]
+
+    assert all(header_row == 1 for result in results for header_row in result)
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from backend import server
+from tests.stub_mongo import StubDatabase
+
+
+class StubMotorClient:
+    instances = []
+
+    def __init__(self, url, event_listeners=None, **options):
+        self.url = url
+        self.database = StubDatabase()
+        self.options = SimpleNamespace(pool_options=SimpleNamespace(max_pool_size=options["maxPoolSize"]))
+        self.closed = False
+        StubMotorClient.instances.append(self)
+
+    def __getitem__(self, name):
+        return self.database
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stub_motor(monkeypatch):
+    StubMotorClient.instances = []
+    monkeypatch.setattr(server, "AsyncIOMotorClient", StubMotorClient)
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    return StubMotorClient
+
+
+def test_lifespan_connects_and_health_reports_live_pool(stub_motor):
+    with TestClient(server.app) as client:
+        response = client.get("/api/health")
+        [motor_client] = stub_motor.instances
+        assert server.db is motor_client.database
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+    assert response.json()["pool"]["max_size"] == 7
+    assert motor_client.closed
+    assert server.db is None and server.client is None
+
+
+def test_health_is_unavailable_when_ping_fails(stub_motor):
+    with TestClient(server.app) as client:
+        server.db.ping_error = ServerSelectionTimeoutError("no servers")
+        response = client.get("/api/health")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+
+
+def test_app_starts_when_database_is_unreachable(stub_motor, monkeypatch):
+    class UnreachableMotorClient(stub_motor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.database.ping_error = ServerSelectionTimeoutError("no servers")
+
+    monkeypatch.setattr(server, "AsyncIOMotorClient", UnreachableMotorClient)
+    monkeypatch.setattr(server.idempotency_store, "_index_ready", False)
+
+    with TestClient(server.app) as client:
+        response = client.get("/api/health")
+
+    assert response.status_code == 503
+    assert not server.idempotency_store._index_ready
+
+
+def test_health_is_unavailable_without_a_database(monkeypatch):
+    monkeypatch.setattr(server, "client", None)
+    monkeypatch.setattr(server, "db", None)
+
+    response = TestClient(server.app).get("/api/health")
+
+    assert response.status_code == 503
+    assert response.json()["pool"]["max_size"] is None
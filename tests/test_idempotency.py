@@ -0,0 +1,208 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from backend import server
+from backend.server import IdempotencyStore
+from tests.stub_mongo import StubDatabase
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    db = StubDatabase()
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def make_store():
+    return IdempotencyStore(wait_seconds=1, lock_timeout_seconds=5, poll_interval=0.01)
+
+
+class CountingHandler:
+    def __init__(self, result=None, error=None, gate=None):
+        self.calls = 0
+        self.result = result if result is not None else {"tender_id": "T1"}
+        self.error = error
+        self.gate = gate
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_requests_without_a_key_run_directly():
+    async def handler():
+        return {"ok": True}
+
+    assert asyncio.run(IdempotencyStore().run("bids", None, {}, handler)) == {"ok": True}
+
+
+def test_overlong_key_is_rejected():
+    async def handler():
+        raise AssertionError("handler must not run")
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(IdempotencyStore().run("bids", "k" * 256, {}, handler))
+
+    assert exc_info.value.status_code == 400
+
+
+def test_repeat_replays_stored_response(stub_db):
+    handler = CountingHandler()
+
+    async def scenario():
+        store = make_store()
+        first = await store.run("bids", "key-1", {"amount": 1}, handler)
+        replay = await store.run("bids", "key-1", {"amount": 1}, handler)
+        return first, replay
+
+    first, replay = asyncio.run(scenario())
+
+    assert first == {"tender_id": "T1"}
+    assert handler.calls == 1
+    assert replay.status_code == 200
+    assert replay.body == b'{"tender_id":"T1"}'
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+def test_concurrent_duplicate_waits_for_the_original(stub_db):
+    async def scenario():
+        gate = asyncio.Event()
+        handler = CountingHandler(gate=gate)
+        store = make_store()
+        original = asyncio.create_task(store.run("bids", "key-1", {"amount": 1}, handler))
+        await asyncio.sleep(0.02)
+        duplicate = asyncio.create_task(store.run("bids", "key-1", {"amount": 1}, handler))
+        await asyncio.sleep(0.05)
+        assert not duplicate.done()
+
+        gate.set()
+        result, replay = await asyncio.gather(original, duplicate)
+        return handler.calls, result, replay
+
+    calls, result, replay = asyncio.run(scenario())
+
+    assert calls == 1
+    assert result == {"tender_id": "T1"}
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+def test_same_key_with_different_payload_is_rejected(stub_db):
+    handler = CountingHandler()
+
+    async def scenario():
+        store = make_store()
+        await store.run("bids", "key-1", {"amount": 1}, handler)
+        await store.run("bids", "key-1", {"amount": 2}, handler)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(scenario())
+
+    assert exc_info.value.status_code == 422
+    assert handler.calls == 1
+
+
+def test_failed_request_releases_its_key(stub_db):
+    failing = CountingHandler(error=HTTPException(status_code=404, detail="Bidder not found"))
+    succeeding = CountingHandler()
+
+    async def scenario():
+        store = make_store()
+        with pytest.raises(HTTPException):
+            await store.run("bids", "key-1", {"amount": 1}, failing)
+        assert stub_db.idempotency_keys.documents == []
+        return await store.run("bids", "key-1", {"amount": 1}, succeeding)
+
+    assert asyncio.run(scenario()) == {"tender_id": "T1"}
+    assert succeeding.calls == 1
+
+
+def test_stale_claim_is_taken_over(stub_db):
+    stale = datetime.utcnow() - timedelta(minutes=10)
+    stub_db.idempotency_keys.documents.append({
+        "_id": "bids:key-1",
+        "fingerprint": IdempotencyStore.fingerprint({"amount": 1}),
+        "status": "in_progress",
+        "created_at": stale,
+        "locked_at": stale,
+    })
+    handler = CountingHandler()
+
+    result = asyncio.run(make_store().run("bids", "key-1", {"amount": 1}, handler))
+
+    assert result == {"tender_id": "T1"}
+    assert handler.calls == 1
+    assert stub_db.idempotency_keys.documents[0]["status"] == "completed"
+
+
+def test_request_that_lost_its_claim_does_not_store_a_response(stub_db):
+    async def scenario():
+        gate = asyncio.Event()
+        store = make_store()
+        original = asyncio.create_task(store.run("bids", "key-1", {"amount": 1}, CountingHandler(gate=gate)))
+        await asyncio.sleep(0.02)
+        # Another worker takes the claim over while the original is still running
+        record = stub_db.idempotency_keys.documents[0]
+        record["locked_at"] = record["locked_at"] + timedelta(minutes=5)
+        gate.set()
+        await original
+        return record
+
+    record = asyncio.run(scenario())
+
+    assert record["status"] == "in_progress"
+    assert "response" not in record
+
+
+def test_failed_response_store_is_retried_without_releasing_the_claim(stub_db, monkeypatch):
+    collection = stub_db.idempotency_keys
+    real_update_one = collection.update_one
+    attempts = []
+
+    async def flaky_update_one(query, update, upsert=False):
+        attempts.append(query)
+        if len(attempts) == 1:
+            raise ConnectionError("connection reset")
+        return await real_update_one(query, update, upsert=upsert)
+
+    monkeypatch.setattr(collection, "update_one", flaky_update_one)
+    handler = CountingHandler()
+
+    async def scenario():
+        store = make_store()
+        assert await store.run("bids", "key-1", {"amount": 1}, handler) == {"tender_id": "T1"}
+        assert collection.documents[0]["status"] == "in_progress"
+        await asyncio.gather(*store._pending_stores)
+        return await store.run("bids", "key-1", {"amount": 1}, handler)
+
+    replay = asyncio.run(scenario())
+
+    assert len(attempts) == 2
+    assert handler.calls == 1
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+def test_bid_is_not_retried_when_version_bump_fails(stub_db, monkeypatch):
+    stub_db.tender_notices.documents.append({"id": "T1", "work_items": [{"id": "W1"}]})
+    stub_db.bidder_profiles.documents.append({"id": "B1"})
+
+    async def failing_update_one(*args, **kwargs):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(stub_db.collection_versions, "update_one", failing_update_one)
+    client = TestClient(server.app)
+    bid = {"tender_id": "T1", "work_item_id": "W1", "bidder_id": "B1", "quoted_amount": 100.0}
+
+    first = client.post("/api/bids", json=bid, headers={"Idempotency-Key": "bump-1"})
+    retry = client.post("/api/bids", json=bid, headers={"Idempotency-Key": "bump-1"})
+
+    assert first.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(stub_db.bid_submissions.documents) == 1
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def loaded_modules_after_import(module):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(','.join(sys.modules))"],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    return set(result.stdout.strip().split(","))
+
+
+def test_excel_parser_imports_without_the_app():
+    loaded = loaded_modules_after_import("backend.excel_parser")
+
+    assert "fastapi" not in loaded
+    assert "motor" not in loaded
+    assert "openpyxl" not in loaded
+    assert "xlrd" not in loaded
+
+
+def test_server_does_not_import_spreadsheet_readers_at_startup():
+    loaded = loaded_modules_after_import("backend.server")
+
+    assert "openpyxl" not in loaded
+    assert "xlrd" not in loaded
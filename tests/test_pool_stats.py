@@ -0,0 +1,19 @@
+from backend.server import PoolStats
+
+
+def test_snapshot_tracks_open_and_in_use_connections():
+    stats = PoolStats()
+    for _ in range(3):
+        stats.connection_created(None)
+        stats.connection_check_out_started(None)
+        stats.connection_checked_out(None)
+    stats.connection_checked_in(None)
+    stats.connection_check_out_started(None)
+    stats.connection_closed(None)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["open_connections"] == 2
+    assert snapshot["in_use"] == 2
+    assert snapshot["waiting"] == 1
+    assert snapshot["total_checkouts"] == 3
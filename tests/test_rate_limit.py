@@ -0,0 +1,207 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from fastapi.testclient import TestClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from backend import server
+from tests.stub_mongo import StubDatabase
+from backend.server import InMemoryRateLimitBackend, MongoRateLimitBackend, RateLimitBackend, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    async def scenario():
+        clock = FakeClock()
+        backend = InMemoryRateLimitBackend(clock=clock)
+
+        assert [await backend.consume("k", rate=1.0, capacity=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert await backend.consume("k", rate=1.0, capacity=3) == pytest.approx(1.0)
+
+        clock.now = 1.0
+        assert await backend.consume("k", rate=1.0, capacity=3) == 0.0
+        assert await backend.consume("other", rate=1.0, capacity=3) == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_limiter_rejects_with_retry_after():
+    async def scenario():
+        limiter = RateLimiter("bidder", per_minute=6, burst=1, backend=InMemoryRateLimitBackend(clock=FakeClock()))
+        await limiter.hit("B1")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.hit("B1")
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers["Retry-After"] == "10"
+
+    asyncio.run(scenario())
+
+
+def test_limiters_sharing_a_backend_keep_their_own_buckets():
+    async def scenario():
+        backend = InMemoryRateLimitBackend(max_keys=3, clock=FakeClock())
+        ip_limiter = RateLimiter("ip", per_minute=120, burst=30, backend=backend)
+        bidder_limiter = RateLimiter("bidder", per_minute=30, burst=10, backend=backend)
+        for _ in range(15):
+            await ip_limiter.hit("10.0.0.1")
+
+        # Bidder traffic filling the table must not refill the busy ip bucket
+        for bidder_id in ("B1", "B2", "B3"):
+            await bidder_limiter.hit(bidder_id)
+            await ip_limiter.hit("10.0.0.1")
+
+        tokens, _ = backend._buckets["ip:10.0.0.1"]
+        assert tokens == 12
+        assert len(backend._buckets) == 3
+
+    asyncio.run(scenario())
+
+
+def test_key_limit_evicts_least_recently_used_bucket():
+    async def scenario():
+        backend = InMemoryRateLimitBackend(max_keys=2, clock=FakeClock())
+        for key in ("a", "b", "a", "c"):
+            await backend.consume(key, rate=1.0, capacity=5)
+
+        assert list(backend._buckets) == ["a", "c"]
+
+    asyncio.run(scenario())
+
+
+def test_backend_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+def evaluate(expression, document, now):
+    """Evaluate the aggregation expressions MongoRateLimitBackend uses"""
+    if expression == "$$NOW":
+        return now
+    if isinstance(expression, str) and expression.startswith("$"):
+        return document.get(expression[1:])
+    if not isinstance(expression, dict):
+        return expression
+    [(operator, args)] = expression.items()
+    values = [evaluate(arg, document, now) for arg in args]
+    if operator == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if operator == "$subtract":
+        difference = values[0] - values[1]
+        return difference.total_seconds() * 1000 if isinstance(difference, timedelta) else difference
+    operations = {
+        "$add": lambda a, b: a + b,
+        "$multiply": lambda a, b: a * b,
+        "$divide": lambda a, b: a / b,
+        "$min": min,
+        "$max": max,
+        "$gte": lambda a, b: a >= b,
+        "$cond": lambda test, then, otherwise: then if test else otherwise,
+    }
+    return operations[operator](*values)
+
+
+class PipelineCollection:
+    """Applies update pipelines with the server clock set by the test"""
+
+    def __init__(self):
+        self.documents = {}
+        self.now = datetime(2025, 5, 21, 10, 0, 0)
+
+    async def find_one_and_update(self, query, pipeline, upsert, return_document):
+        assert upsert and return_document == ReturnDocument.AFTER
+        document = dict(self.documents.get(query["_id"], query))
+        for stage in pipeline:
+            document.update({
+                field: evaluate(expression, document, self.now)
+                for field, expression in stage["$set"].items()
+            })
+        self.documents[query["_id"]] = document
+        return document
+
+
+def test_mongo_backend_refills_on_the_server_clock(monkeypatch):
+    collection = PipelineCollection()
+    monkeypatch.setattr(server, "db", SimpleNamespace(rate_limits=collection))
+
+    async def scenario():
+        backend = MongoRateLimitBackend()
+        assert [await backend.consume("ip:1", rate=1.0, capacity=2) for _ in range(2)] == [0.0, 0.0]
+        assert await backend.consume("ip:1", rate=1.0, capacity=2) == pytest.approx(1.0)
+
+        collection.now += timedelta(seconds=1)
+        assert await backend.consume("ip:1", rate=1.0, capacity=2) == 0.0
+        assert collection.documents["ip:1"]["updated_at"] == collection.now
+
+    asyncio.run(scenario())
+
+
+class Database(SimpleNamespace):
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+class UnreachableCollection(PipelineCollection):
+    def __init__(self):
+        super().__init__()
+        self.index_attempts = 0
+        self.reachable = False
+
+    async def create_index(self, *args, **kwargs):
+        self.index_attempts += 1
+        if not self.reachable:
+            raise ServerSelectionTimeoutError("no servers")
+        return "index"
+
+
+def test_mongo_backend_setup_survives_unreachable_database(monkeypatch):
+    collection = UnreachableCollection()
+    monkeypatch.setattr(server, "db", Database(rate_limits=collection))
+
+    async def scenario():
+        backend = MongoRateLimitBackend()
+        await backend.setup()
+        assert collection.index_attempts == 1
+
+        collection.reachable = True
+        assert await backend.consume("ip:1", rate=1.0, capacity=2) == 0.0
+        await backend.consume("ip:1", rate=1.0, capacity=2)
+        assert collection.index_attempts == 2
+
+    asyncio.run(scenario())
+
+
+def test_replayed_bid_does_not_spend_bidder_tokens(monkeypatch):
+    db = StubDatabase()
+    db.tender_notices.documents.append({"id": "T1", "work_items": [{"id": "W1"}]})
+    db.bidder_profiles.documents.append({"id": "B1"})
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "bidder_limiter", RateLimiter(
+        "bidder", per_minute=1, burst=1, backend=InMemoryRateLimitBackend(),
+    ))
+    client = TestClient(server.app)
+    bid = {"tender_id": "T1", "work_item_id": "W1", "bidder_id": "B1", "quoted_amount": 100.0}
+
+    first = client.post("/api/bids", json=bid, headers={"Idempotency-Key": "retry-1"})
+    retry = client.post("/api/bids", json=bid, headers={"Idempotency-Key": "retry-1"})
+    fresh = client.post("/api/bids", json=bid, headers={"Idempotency-Key": "retry-2"})
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    assert fresh.status_code == 429
+    assert len(db.bid_submissions.documents) == 1